@@ -1,8 +1,11 @@
+import os
+import sys
+from collections import OrderedDict
+from dataclasses import dataclass
 from typing import Annotated
 from fastmcp import FastMCP
 from fastmcp.server.context import Context
 from fastmcp.dependencies import CurrentContext
-from datetime import datetime
 
 mcp = FastMCP(
     name="todo",
@@ -11,50 +14,109 @@ A stateful todo list manager that maintains tasks throughout an agent session. E
 """.strip(),
 )
 
-# Per-session todo storage: session_id -> list of todos
-_session_todos: dict[str, list[dict]] = {}
+
+@dataclass(slots=True)
+class Todo:
+    """A validated todo item."""
+
+    content: str
+    activeForm: str
+    status: str
+
+
+# Per-session todo storage: session_id -> (list of todos, formatted display),
+# kept in least-recently-used order so abandoned sessions are evicted
+_session_todos: OrderedDict[str, tuple[list[Todo], str]] = OrderedDict()
+_MAX_SESSIONS = int(os.environ.get("MCP_MAX_SESSIONS", "10000"))
+
+# Display for each valid status: (icon, position in the summary counts, show activeForm)
+_STATUS_FORMATS = {
+    "pending": ("[ ]", 0, False),
+    "in_progress": ("[~]", 1, True),
+    "completed": ("[x]", 2, False),
+}
+# Canonical (interned) string for each valid status
+_STATUS_NORMALIZE = {status: sys.intern(status) for status in _STATUS_FORMATS}
+# Display for an empty list
+_EMPTY_RESPONSE = "Todo list is empty."
 
 
 def _get_session_key(ctx: Context) -> str:
     """Get a unique key for the current session."""
     # Use session_id if available (HTTP transports), otherwise fall back to client_id or a default
-    return ctx.session_id or ctx.client_id or "default"
+    return sys.intern(ctx.session_id or ctx.client_id or "default")
+
+
+def _store_todos(session_key: str, todos: list[Todo], formatted: str) -> None:
+    """Store todos for a session, evicting the least recently used session if over capacity."""
+    _session_todos[session_key] = (todos, formatted)
+    _session_todos.move_to_end(session_key)
+    if len(_session_todos) > _MAX_SESSIONS:
+        _session_todos.popitem(last=False)
 
 
-def _get_todos(session_key: str) -> list[dict]:
-    """Get todos for a session, creating empty list if needed."""
-    if session_key not in _session_todos:
-        _session_todos[session_key] = []
-    return _session_todos[session_key]
+def clear_session(session_key: str) -> None:
+    """Drop all stored state for a session.
+
+    Nothing calls this automatically; sessions that are never cleared are evicted by the LRU cap.
+    """
+    _session_todos.pop(session_key, None)
+
+
+def _validate_todos(todos: list[dict]) -> list[Todo]:
+    """Validate todos, skipping entries without content and filling in defaults.
+
+    content and activeForm are stored as str so list equality matches the rendered display.
+    """
+    normalize_status = _STATUS_NORMALIZE.get
+    # A comprehension measured faster than both an explicit append loop and
+    # filling a [None] * len(todos) list; malformed input falls back to the loop
+    try:
+        return [
+            Todo(str(content), str(todo.get("activeForm") or content), normalize_status(todo.get("status"), "pending"))
+            for todo in todos
+            if (content := todo.get("content"))
+        ]
+    except (AttributeError, TypeError):
+        # A non-dict entry or an unhashable status somewhere in the list
+        pass
+
+    validated_todos = []
+    for todo in todos:
+        try:
+            content = todo.get("content")
+        except AttributeError:
+            # Not a dict
+            continue
+        if not content:
+            continue
+        try:
+            status = normalize_status(todo.get("status"), "pending")
+        except TypeError:
+            # Unhashable status
+            status = "pending"
+        validated_todos.append(Todo(str(content), str(todo.get("activeForm") or content), status))
+    return validated_todos
 
 
-def _format_todos(todos: list[dict]) -> str:
+def _format_todos(todos: list[Todo]) -> str:
     """Format todos for display."""
     if not todos:
-        return "Todo list is empty."
+        return _EMPTY_RESPONSE
 
-    lines = ["Todo List:"]
+    get_format = _STATUS_FORMATS.get
+    pending_format = _STATUS_FORMATS["pending"]
+    counts = [0, 0, 0]
+    lines = [None] * (len(todos) + 2)
+    lines[0] = "Todo List:"
     for i, todo in enumerate(todos, 1):
-        status_icon = {
-            "pending": "[ ]",
-            "in_progress": "[~]",
-            "completed": "[x]",
-        }.get(todo.get("status", "pending"), "[ ]")
-
-        content = todo.get("content", "")
-        active_form = todo.get("activeForm", "")
-        status = todo.get("status", "pending")
-
-        if status == "in_progress":
-            lines.append(f"{i}. {status_icon} {active_form}")
-        else:
-            lines.append(f"{i}. {status_icon} {content}")
-
-    pending = sum(1 for t in todos if t.get("status") == "pending")
-    in_progress = sum(1 for t in todos if t.get("status") == "in_progress")
-    completed = sum(1 for t in todos if t.get("status") == "completed")
-    lines.append(f"\nSummary: {pending} pending, {in_progress} in progress, {completed} completed")
+        icon, idx, use_active_form = get_format(todo.status, pending_format)
+        counts[idx] += 1
+        lines[i] = f"{i}. {icon} {todo.activeForm if use_active_form else todo.content}"
 
+    lines[-1] = f"\nSummary: {counts[0]} pending, {counts[1]} in progress, {counts[2]} completed"
+
+    # str.join measured faster than writing to an io.StringIO at every list size up to 10k todos
     return "\n".join(lines)
 
 
@@ -65,33 +127,26 @@ def _format_todos(todos: list[dict]) -> str:
     exclude_args=["cutoff_date"],
     tags={"backtesting_supported"},
 )
-async def write_todos(
+def write_todos(
     todos: Annotated[list[dict], "List of todo objects with 'content', 'activeForm', and 'status' fields"],
-    cutoff_date: Annotated[str, "The date must be in the format YYYY-MM-DD"] = datetime.now().strftime("%Y-%m-%d"),
+    cutoff_date: Annotated[str | None, "The date must be in the format YYYY-MM-DD"] = None,
     ctx: Context = CurrentContext(),
 ) -> str:
     session_key = _get_session_key(ctx)
 
-    validated_todos = []
-    for todo in todos:
-        if not isinstance(todo, dict):
-            continue
-
-        content = todo.get("content", "")
-        active_form = todo.get("activeForm", "")
-        status = todo.get("status", "pending")
-
-        if not content:
-            continue
+    if not todos:
+        # Clearing the list is common; skip validation and formatting
+        _store_todos(session_key, [], _EMPTY_RESPONSE)
+        return _EMPTY_RESPONSE
 
-        if status not in ("pending", "in_progress", "completed"):
-            status = "pending"
+    validated_todos = _validate_todos(todos)
 
-        validated_todos.append({
-            "content": content,
-            "activeForm": active_form or content,
-            "status": status,
-        })
+    # Unchanged list: reuse the display rendered on the previous write
+    cached = _session_todos.get(session_key)
+    if cached is not None and cached[0] == validated_todos:
+        _session_todos.move_to_end(session_key)
+        return cached[1]
 
-    _session_todos[session_key] = validated_todos
-    return _format_todos(validated_todos)
+    formatted = _format_todos(validated_todos)
+    _store_todos(session_key, validated_todos, formatted)
+    return formatted
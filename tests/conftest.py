@@ -1,6 +1,16 @@
 import sys
 from pathlib import Path
 
+import pytest
+
 # Add parent directory to Python path so we can import the server module
 parent_dir = Path(__file__).parent.parent
 sys.path.insert(0, str(parent_dir))
+
+
+@pytest.fixture(scope="session")
+def all_tools():
+    """All tools registered with the MCP server, looked up once per test session."""
+    from server import mcp
+
+    return dict(mcp._tool_manager._tools)
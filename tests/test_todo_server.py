@@ -1,7 +1,8 @@
 import inspect
 import pytest
 from unittest.mock import MagicMock, AsyncMock
-from server import write_todos, mcp, _session_todos, _format_todos
+import server
+from server import write_todos, _session_todos, _format_todos, clear_session, Todo
 
 
 def reset_todos():
@@ -19,10 +20,9 @@ class MockContext:
 class TestWriteTodosToolConfiguration:
     """Tests for write_todos tool configuration."""
 
-    def test_tool_is_registered(self):
+    def test_tool_is_registered(self, all_tools):
         """write_todos tool should be registered with the MCP server."""
-        tools = mcp._tool_manager._tools
-        assert "write_todos" in tools
+        assert "write_todos" in all_tools
 
     def test_tool_has_todos_parameter(self):
         """write_todos tool must have 'todos' as a function parameter."""
@@ -56,24 +56,21 @@ class TestWriteTodosFunctionality:
         """Reset state before each test."""
         reset_todos()
 
-    @pytest.mark.asyncio
-    async def test_write_empty_list(self):
+    def test_write_empty_list(self):
         """Writing an empty list should clear todos."""
         ctx = MockContext()
-        result = await write_todos.fn([], ctx)
+        result = write_todos.fn([], ctx=ctx)
         assert "empty" in result.lower()
 
-    @pytest.mark.asyncio
-    async def test_write_single_todo(self):
+    def test_write_single_todo(self):
         """Writing a single todo should work."""
         ctx = MockContext()
         todos = [{"content": "Fix bug", "activeForm": "Fixing bug", "status": "pending"}]
-        result = await write_todos.fn(todos, ctx)
+        result = write_todos.fn(todos, ctx=ctx)
         assert "Fix bug" in result
         assert "[ ]" in result  # pending icon
 
-    @pytest.mark.asyncio
-    async def test_write_multiple_todos(self):
+    def test_write_multiple_todos(self):
         """Writing multiple todos should work."""
         ctx = MockContext()
         todos = [
@@ -81,81 +78,88 @@ class TestWriteTodosFunctionality:
             {"content": "Task 2", "activeForm": "Working on task 2", "status": "in_progress"},
             {"content": "Task 3", "activeForm": "Working on task 3", "status": "completed"},
         ]
-        result = await write_todos.fn(todos, ctx)
+        result = write_todos.fn(todos, ctx=ctx)
         assert "Task 1" in result
         assert "Working on task 2" in result  # in_progress shows activeForm
         assert "Task 3" in result
 
-    @pytest.mark.asyncio
-    async def test_state_persistence_within_session(self):
+    def test_state_persistence_within_session(self):
         """State should persist between calls within the same session."""
         ctx = MockContext(session_id="session-1")
 
         todos1 = [{"content": "First", "activeForm": "First", "status": "pending"}]
-        await write_todos.fn(todos1, ctx)
+        write_todos.fn(todos1, ctx=ctx)
 
         todos2 = [
             {"content": "First", "activeForm": "First", "status": "completed"},
             {"content": "Second", "activeForm": "Second", "status": "pending"},
         ]
-        result = await write_todos.fn(todos2, ctx)
+        result = write_todos.fn(todos2, ctx=ctx)
         assert "First" in result
         assert "Second" in result
         assert "2." in result  # Should show 2 items
 
-    @pytest.mark.asyncio
-    async def test_session_isolation(self):
+    def test_session_isolation(self):
         """Different sessions should have isolated todo lists."""
         ctx1 = MockContext(session_id="session-1")
         ctx2 = MockContext(session_id="session-2")
 
         # Write to session 1
         todos1 = [{"content": "Session 1 task", "activeForm": "Session 1 task", "status": "pending"}]
-        await write_todos.fn(todos1, ctx1)
+        write_todos.fn(todos1, ctx=ctx1)
 
         # Write to session 2
         todos2 = [{"content": "Session 2 task", "activeForm": "Session 2 task", "status": "pending"}]
-        await write_todos.fn(todos2, ctx2)
+        write_todos.fn(todos2, ctx=ctx2)
 
         # Verify session isolation
         assert "session-1" in _session_todos
         assert "session-2" in _session_todos
-        assert len(_session_todos["session-1"]) == 1
-        assert len(_session_todos["session-2"]) == 1
-        assert _session_todos["session-1"][0]["content"] == "Session 1 task"
-        assert _session_todos["session-2"][0]["content"] == "Session 2 task"
-
-    @pytest.mark.asyncio
-    async def test_invalid_status_defaults_to_pending(self):
+        session1_todos, _ = _session_todos["session-1"]
+        session2_todos, _ = _session_todos["session-2"]
+        assert len(session1_todos) == 1
+        assert len(session2_todos) == 1
+        assert session1_todos[0].content == "Session 1 task"
+        assert session2_todos[0].content == "Session 2 task"
+
+    def test_invalid_status_defaults_to_pending(self):
         """Invalid status should default to pending."""
         ctx = MockContext()
         todos = [{"content": "Test", "activeForm": "Testing", "status": "invalid"}]
-        result = await write_todos.fn(todos, ctx)
+        result = write_todos.fn(todos, ctx=ctx)
         assert "[ ]" in result  # pending icon
 
-    @pytest.mark.asyncio
-    async def test_missing_active_form_uses_content(self):
+    def test_malformed_entries(self):
+        """Non-dict entries should be skipped and unhashable statuses default to pending."""
+        ctx = MockContext()
+        todos = [
+            "not a todo",
+            {"content": "Task", "activeForm": "Doing task", "status": ["in_progress"]},
+        ]
+        result = write_todos.fn(todos, ctx=ctx)
+        assert "1. [ ] Task" in result
+        assert "2." not in result
+
+    def test_missing_active_form_uses_content(self):
         """Missing activeForm should default to content."""
         ctx = MockContext()
         todos = [{"content": "Test task", "status": "in_progress"}]
-        result = await write_todos.fn(todos, ctx)
+        result = write_todos.fn(todos, ctx=ctx)
         assert "Test task" in result
 
-    @pytest.mark.asyncio
-    async def test_empty_content_skipped(self):
+    def test_empty_content_skipped(self):
         """Todos with empty content should be skipped."""
         ctx = MockContext()
         todos = [
             {"content": "", "activeForm": "Empty", "status": "pending"},
             {"content": "Valid", "activeForm": "Valid", "status": "pending"},
         ]
-        result = await write_todos.fn(todos, ctx)
+        result = write_todos.fn(todos, ctx=ctx)
         assert "Valid" in result
         assert "1." in result  # Only one item
         assert "2." not in result
 
-    @pytest.mark.asyncio
-    async def test_summary_counts(self):
+    def test_summary_counts(self):
         """Summary should show correct counts."""
         ctx = MockContext()
         todos = [
@@ -164,24 +168,67 @@ class TestWriteTodosFunctionality:
             {"content": "C", "activeForm": "C", "status": "in_progress"},
             {"content": "D", "activeForm": "D", "status": "completed"},
         ]
-        result = await write_todos.fn(todos, ctx)
+        result = write_todos.fn(todos, ctx=ctx)
         assert "2 pending" in result
         assert "1 in progress" in result
         assert "1 completed" in result
 
+    def test_unchanged_list_reuses_formatted_output(self):
+        """Rewriting an identical list should return the cached display."""
+        ctx = MockContext()
+        todos = [{"content": "Task", "activeForm": "Doing task", "status": "in_progress"}]
+        first = write_todos.fn(todos, ctx=ctx)
+        second = write_todos.fn([dict(t) for t in todos], ctx=ctx)
+        assert second is first
+        assert _session_todos["test-session"] == (
+            [Todo("Task", "Doing task", "in_progress")],
+            first,
+        )
+
+    def test_equal_non_string_content_re_renders(self):
+        """Values that compare equal but render differently should not reuse the cached display."""
+        ctx = MockContext()
+        first = write_todos.fn([{"content": 1}], ctx=ctx)
+        second = write_todos.fn([{"content": True}], ctx=ctx)
+        assert "1. [ ] 1" in first
+        assert "1. [ ] True" in second
+        assert _session_todos["test-session"][0] == [Todo("True", "True", "pending")]
+
+    def test_clearing_list(self):
+        """Writing an empty list should store an empty list."""
+        ctx = MockContext()
+        write_todos.fn([{"content": "A", "activeForm": "A", "status": "pending"}], ctx=ctx)
+        result = write_todos.fn([], ctx=ctx)
+        assert result == "Todo list is empty."
+        assert _session_todos["test-session"] == ([], result)
+
+    def test_least_recently_used_session_evicted(self, monkeypatch):
+        """Sessions beyond the cap should be evicted oldest-first."""
+        monkeypatch.setattr(server, "_MAX_SESSIONS", 2)
+        todos = [{"content": "Task", "activeForm": "Task", "status": "pending"}]
+        write_todos.fn(todos, ctx=MockContext(session_id="session-1"))
+        write_todos.fn(todos, ctx=MockContext(session_id="session-2"))
+        # Touch session 1 so session 2 becomes the oldest
+        write_todos.fn(todos, ctx=MockContext(session_id="session-1"))
+        write_todos.fn(todos, ctx=MockContext(session_id="session-3"))
+        assert list(_session_todos) == ["session-1", "session-3"]
+
+    def test_clear_session(self):
+        """clear_session should drop only the given session."""
+        todos = [{"content": "Task", "activeForm": "Task", "status": "pending"}]
+        write_todos.fn(todos, ctx=MockContext(session_id="session-1"))
+        write_todos.fn(todos, ctx=MockContext(session_id="session-2"))
+        clear_session("session-1")
+        clear_session("missing")
+        assert list(_session_todos) == ["session-2"]
+
 
 class TestAllToolsBacktestingConsistency:
     """Tests to ensure all tools have consistent backtesting configuration."""
 
-    def get_all_tools(self):
-        """Get all registered tools from the MCP server."""
-        return mcp._tool_manager._tools
-
-    def test_all_non_backtest_tools_have_correct_configuration(self):
+    def test_all_non_backtest_tools_have_correct_configuration(self, all_tools):
         """All tools without backtesting_supported tag must NOT have cutoff_date."""
-        tools = self.get_all_tools()
-
-        for tool_name, tool in tools.items():
+        for tool_name, tool in all_tools.items():
             tags = getattr(tool, "tags", set()) or set()
 
             if "backtesting_supported" not in tags: